@@ -32,123 +32,241 @@ Thüringen: TH
 """
 
 
+from __future__ import annotations
+
 from datetime import date
-from datetime import timedelta
+from calendar import isleap
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import (Dict, FrozenSet, ItemsView, Iterable, Iterator, KeysView,
+                    List, Mapping, Optional, Tuple, ValuesView)
 
 
 class UnknownStateCodeException(Exception):
     pass
 
 
-class Holidays:
+_VALID_STATES = frozenset((
+    'BW', 'BY', 'BE', 'BB',
+    'HB', 'HH', 'HE', 'MV',
+    'NI', 'NW', 'RP', 'SL',
+    'SN', 'ST', 'SH', 'TH'))
+
+
+def _easter_ymd(year:int) -> Tuple[int, int]:
     """
-    Calculate holidays for year in state.
-    If state is not given, calculate all.
+    calculate easter sunday using Lichtenberg’s algorithm
 
-    :param year: year to calculate holidays for
-    :param state: state to calculate holidays for
+    plain integer arithmetic only, the date
+    is constructed by the caller
+
+    :param year: year to calculate easter sunday for
+    :return: easter sunday as (month, day)
     """
 
-    def __init__(self, year:int, state:str=None): 
+    x = year
+    # Säkularzahl
+    k = x // 100
+    # (3 * k + 3) // 4 as shift and (8 * k + 13) // 25
+    # as multiply and shift, exact for all years up to 14199
+    q = (3 * k + 3) >> 2
+    # säkulare Mondschaltung
+    m = 15 + q - ((8 * k + 13) * 41 >> 10)
+    # säkulare Sonnenschaltung
+    s = 2 - q
+    # Mondparameter
+    a = x % 19
+    # Keim für den ersten Vollmond im Frühling
+    d = (19 * a + m) % 30
+    # kalendarische Korrekturgröße
+    r = (d + a // 11) // 29
+    # Ostergrenze
+    og = 21 + d - r
+    # erster Sonntag im März
+    sz = 7 - (x + x // 4 + s) % 7
+    # Entfernung des Ostersonntags von der Ostergrenze (Osterentfernung)
+    oe = 7 - (og - sz) % 7
+    # Datum des Ostersonntags als Märzdatum
+    os = og + oe
+
+    if os > 31:
+        return 4, os - 31
+    else:
+        return 3, os
+
+
+def _is_weekend(ordinal:int) -> bool:
+    """
+    tell whether a proleptic gregorian ordinal is a weekend day
 
-        # prepare
-        easter_sunday = Holidays.get_easter_sunday(year)
+    ordinal 1 is monday, so (ordinal + 6) % 7
+    is the weekday with saturday 5 and sunday 6
 
-        self.state = state.upper() if state else None
-        self.year = year
-        
-        if self.state and self.state not in ( 
-                                    'BW', 'BY', 'BE', 'BB', 
-                                    'HB', 'HH', 'HE', 'MV', 
-                                    'NI', 'NW', 'RP', 'SL', 
-                                    'SN', 'ST', 'SH', 'TH'):
+    :param ordinal: ordinal as returned by date.toordinal()
+    :return: True for saturday and sunday
+    """
 
-            raise UnknownStateCodeException
+    return (ordinal + 6) % 7 >= 5
+
+
+# practical range of years
+_YEARS = range(1900, 2201)
+
+# easter sundays for the practical range of years
+# are calculated once at import
+_EASTER_SUNDAYS = {year: date(year, *_easter_ymd(year)) for year in _YEARS}
+
+
+# fixed holidays as (month, day)
+_FIXED = {
+    'new year': (1, 1),
+    'epiphany': (1, 6),
+    'womens day': (3, 8),
+    'labor day': (5, 1),
+    'assumption': (8, 15),
+    'german unification day': (10, 3),
+    'reformation day': (10, 31),
+    'all saints': (11, 1),
+    'first christmas holiday': (12, 25),
+    'second christmas holiday': (12, 26),
+}
+
+# movable holidays as offset in days from easter sunday
+_OFFSET = {
+    'good friday': -2,
+    'easter sunday': 0,
+    'easter monday': 1,
+    'ascention': 39,
+    'whit_sunday': 49,
+    'whit monday': 50,
+    'corpus christi': 60,
+}
+
+# holidays observed in all states
+_COMMON = frozenset((
+    'new year', 'labor day', 'german unification day',
+    'first christmas holiday', 'second christmas holiday',
+    'good friday', 'easter monday', 'ascention', 'whit monday'))
+
+# holidays observed per state
+_STATE_RULES: Dict[Optional[str], FrozenSet[str]] = {
+    'BW': _COMMON | {'epiphany', 'all saints', 'corpus christi'},
+    'BY': _COMMON | {'epiphany', 'assumption', 'all saints', 'corpus christi'},
+    'BE': _COMMON | {'womens day'},
+    'BB': _COMMON | {'easter sunday', 'whit_sunday', 'reformation day'},
+    'HB': _COMMON | {'reformation day'},
+    'HH': _COMMON | {'reformation day'},
+    'HE': _COMMON | {'corpus christi'},
+    'MV': _COMMON | {'reformation day'},
+    'NI': _COMMON | {'reformation day'},
+    'NW': _COMMON | {'all saints', 'corpus christi'},
+    'RP': _COMMON | {'all saints', 'corpus christi'},
+    'SL': _COMMON | {'assumption', 'all saints', 'corpus christi'},
+    'SN': _COMMON | {'reformation day', 'repentance and prayer'},
+    'ST': _COMMON | {'epiphany', 'reformation day'},
+    'SH': _COMMON | {'reformation day'},
+    'TH': _COMMON | {'reformation day'},
+}
+
+# no state given means all holidays
+_STATE_RULES[None] = frozenset().union(*_STATE_RULES.values())
 
-        self._holidays={}
 
-        # common
-        self._holidays['new year'] = date(year, 1, 1)
-        self._holidays['labor day'] = date(year, 5, 1)
-        self._holidays['german unification day'] = date(year, 10, 3)
-        self._holidays['first christmas holiday'] = date(year, 12, 25)
-        self._holidays['second christmas holiday'] = date(year, 12, 26)
-        self._holidays['good friday'] = easter_sunday - timedelta(days=2)
-        self._holidays['easter monday'] = easter_sunday + timedelta(days=1)
-        self._holidays['ascention'] = easter_sunday + timedelta(days=39)
-        self._holidays['whit monday'] = easter_sunday + timedelta(days=50)
+class Holidays:
+    """
+    Calculate holidays for year in state.
+    If state is not given, calculate all.
+
+    :param year: year to calculate holidays for
+    :param state: state to calculate holidays for
 
-        # state related
-        if self.state:
-            if self.state in ['BY', 'BW', 'ST']:
-                self._holidays['epiphany'] = date(year, 1, 6)
+    instances are values identified by year and state,
+    they compare, hash, pickle and copy as such
+
+    >>> import copy, pickle
+    >>> h = Holidays(2024, 'BW')
+    >>> h == Holidays(2024, 'bw') and hash(h) == hash(Holidays(2024, 'bw'))
+    True
+    >>> pickle.loads(pickle.dumps(h)) == h
+    True
+    >>> copy.deepcopy(h) == h
+    True
+    """
 
-            if self.state in ['BE']:
-                self._holidays['womens day'] = date(year, 3, 8)
+    __slots__ = ('_state', '_year', '_holidays', '_non_weekend_holidays')
 
-            if self.state in ['BB']:
-                self._holidays['easter sunday'] = easter_sunday
+    _state: Optional[str]
+    _year: int
+    _holidays: Mapping[str, date]
+    _non_weekend_holidays: int
 
-            if self.state in ['BB']:
-                self._holidays['whit_sunday'] = easter_sunday + timedelta(days=49)
+    def __init__(self, year:int, state:Optional[str]=None) -> None:
 
-            if self.state in ['BY', 'SL']:
-                self._holidays['assumption'] = date(year, 8, 15)
+        self._state = state.upper() if state else None
+        self._year = year
+        
+        if self._state is not None and self._state not in _VALID_STATES:
+            raise UnknownStateCodeException(self._state)
 
-            if self.state in ['BB', 'HB', 'HH', 'MV', 'NI', 'SN', 'ST', 'SH', 'TH']:
-                self._holidays['reformation day'] = date(year, 10, 31)
+        self._holidays, self._non_weekend_holidays = _build_holidays(year, self._state)
 
-            if self.state in ['BW', 'BY', 'NW', 'RP', 'SL']:
-                self._holidays['all saints'] = date(year, 11, 1)
+    # read-only as instances are hashed by year and state
 
-            # repentance and prayer is wednesday between Nov. 16th and Nov. 22nd
-            if self.state in ['SN']:
-                for day in range(16, 23):
-                    if date(year, 11, day).isoweekday() == 3:
-                        self._holidays['repentance and prayer'] = date(year, 11, day)
+    @property
+    def state(self) -> Optional[str]:
+        return self._state
 
-            if self.state in ['BW', 'BY', 'HE', 'NW', 'RP', 'SL']:
-                self._holidays['corpus christi'] = easter_sunday + timedelta(days=60)
+    @property
+    def year(self) -> int:
+        return self._year
 
 
-    def __repr__(self):
+    def __repr__(self) -> str:
         return f"Holidays({self.year}, '{self.state}')"
 
-    def __str__(self):
-        string = ''
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, Holidays):
+            return NotImplemented
+        return (self.year, self.state) == (other.year, other.state)
 
-        swapped_dict = sorted(
-            [(self._holidays[holiday], holiday) for holiday in self._holidays])
+    def __hash__(self) -> int:
+        return hash((self.year, self.state))
 
-        for item in swapped_dict:
-            string += f'\n{item[0].strftime("%d.%m.%Y")}: {item[1]}'
+    def __reduce__(self) -> Tuple[type, Tuple[int, Optional[str]]]:
+        # the holiday mapping is a shared read-only proxy,
+        # so instances are rebuilt from year and state
+        return Holidays, (self.year, self.state)
 
-        # omit first newline
-        return string[1:]
-            
+    def __str__(self) -> str:
+        # ordered by date, then name
+        return '\n'.join(
+            f'{day:%d.%m.%Y}: {holiday}'
+            for holiday, day in sorted(self._holidays.items(), key=itemgetter(1, 0)))
 
-    def __getitem__(self, item):
-        return self._holidays['item']
+    def __getitem__(self, item:str) -> date:
+        return self._holidays[item]
 
-    def __contains__(self, item):
+    def __contains__(self, item:object) -> bool:
         return self._holidays.__contains__(item)
 
-    def __iter__(self):
+    def __iter__(self) -> Iterator[str]:
         return self._holidays.__iter__()
 
-    def __len__(self):
+    def __len__(self) -> int:
         return self._holidays.__len__()
 
-    def items(self):
+    def items(self) -> ItemsView[str, date]:
         return self._holidays.items()
 
-    def keys(self):
+    def keys(self) -> KeysView[str]:
         return self._holidays.keys()
 
-    def values(self):
+    def values(self) -> ValuesView[date]:
         return self._holidays.values()
 
 
+    @staticmethod
     def get_easter_sunday(year:int) -> date:
         """
         return date of easter sunday
@@ -158,42 +276,17 @@ class Holidays:
         :rtype: datetime.date
         """
 
-        x = year
-        # Säkularzahl
-        k = x // 100
-        # säkulare Mondschaltung
-        m = 15 + (3 * k + 3) // 4 - (8 * k + 13) // 25
-        # säkulare Sonnenschaltung
-        s = 2 - (3 * k + 3) // 4
-        # Mondparameter
-        a = x % 19
-        # Keim für den ersten Vollmond im Frühling
-        d = (19 * a + m) % 30
-        # kalendarische Korrekturgröße
-        r = (d + a // 11) // 29
-        # Ostergrenze
-        og = 21 + d - r
-        # erster Sonntag im März
-        sz = 7 - (x + x // 4 + s) % 7
-        # Entfernung des Ostersonntags von der Ostergrenze (Osterentfernung)
-        oe = 7 - (og - sz) % 7
-        # Datum des Ostersonntags als Märzdatum
-        os = og + oe
-
-        if os > 31:
-            return date(year, 4, os - 31)
-        else:
-            return date(year, 3, os)
-
-
-    def get_all(self) -> tuple:
+        return _EASTER_SUNDAYS.get(year) or date(year, *_easter_ymd(year))
+
+
+    def get_all(self) -> Tuple[date, ...]:
         """
         return all holidays dates.
 
         :return: a tuple containing all holidays dates as datetime.date 
         """
 
-        return self._holidays.values()
+        return tuple(self._holidays.values())
 
 
     def get_working_days(self) -> int:
@@ -211,26 +304,88 @@ class Holidays:
         # we will adjust for leap-years in the end
         workdays = 261
 
+        # weekdays are taken from ordinals, see _is_weekend
+        first_day = date(self.year, 1, 1).toordinal()
+
         # if first (and thus last if no leap-year) day
         # is weekend we subtract one more
-        if date(self.year, 1, 1).isoweekday() >= 6:
+        if _is_weekend(first_day):
             workdays -= 1
 
         # if this is a leap-year and the last day of the year
         # is no weekend, we have to add one
-        try:
-            date(self.year, 2, 29)
-            if date(self.year, 12, 31).isoweekday() < 6:
-                workdays += 1
-        except ValueError:
-            pass
+        if isleap(self.year) and not _is_weekend(first_day + 365):
+            workdays += 1
 
         # in the end we substract the holidays not on a weekend
-        for holiday in self.get_all():
-            if holiday and holiday.isoweekday() < 6:
-                workdays -= 1
+        return workdays - self._non_weekend_holidays
+
+
+    @classmethod
+    def working_days_range(cls, first_year:int, last_year:int,
+                           state:Optional[str]=None) -> List[int]:
+        """
+        return the number of working days for a range of years
+
+        :param first_year: first year of the range
+        :param last_year: last year of the range, inclusive
+        :param state: state to calculate working days for
+        :return: a list containing the number of working days per year
+        """
+
+        return cls.working_days_batch(range(first_year, last_year + 1), state)
+
+    @classmethod
+    def working_days_batch(cls, years:Iterable[int],
+                           state:Optional[str]=None) -> List[int]:
+        """
+        return the number of working days for any number of years
+
+        :param years: years to calculate working days for
+        :param state: state to calculate working days for
+        :return: a list containing the number of working days per year
+                 in the order of years given
+        """
+
+        return [cls(year, state).get_working_days() for year in years]
+
+
+# large enough to keep every state for the practical range of years
+@lru_cache(maxsize=len(_YEARS) * len(_STATE_RULES))
+def _build_holidays(year:int, state:Optional[str]) -> Tuple[Mapping[str, date], int]:
+    """
+    calculate holidays for year in state.
+
+    results are cached per (year, state) and returned
+    as read-only mapping, as they are shared between
+    all Holidays instances for the same year and state.
+
+    :param year: year to calculate holidays for
+    :param state: upper case state code or None
+    :return: read-only mapping of holiday names to dates
+             and the number of holidays not on a weekend
+    """
+
+    easter_ordinal = Holidays.get_easter_sunday(year).toordinal()
+    rules = _STATE_RULES[state]
+
+    holidays = {name: date(year, *month_day)
+                for name, month_day in _FIXED.items() if name in rules}
+    holidays.update({name: date.fromordinal(easter_ordinal + offset)
+                     for name, offset in _OFFSET.items() if name in rules})
+
+    # repentance and prayer is wednesday between Nov. 16th and Nov. 22nd
+    # so go back from Nov. 22nd to the last wednesday
+    if 'repentance and prayer' in rules:
+        weekday_22 = date(year, 11, 22).isoweekday()
+        holidays['repentance and prayer'] = date(year, 11, 22 - (weekday_22 - 3) % 7)
+
+    # holidays not on a weekend, counted once per date
+    # as e.g. ascention and labor day may coincide
+    non_weekend_holidays = len(
+        {ordinal for ordinal in map(date.toordinal, holidays.values())
+         if not _is_weekend(ordinal)})
 
-        # done
-        return workdays
+    return MappingProxyType(holidays), non_weekend_holidays
 
 # vim: set ai sts=4 ts=4 sw=4 et: